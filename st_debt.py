@@ -1,273 +1,393 @@
+import functools
+import math
+from collections import namedtuple
 import streamlit as st
 from datetime import datetime
-import matplotlib.pyplot as plt
+from matplotlib.figure import Figure
+import numpy as np
 import pandas as pd
 
 # Function Definitions
-def calculate_remaining_balance(principal, annual_rate, months_elapsed, total_term):
-    if annual_rate == 0:
+FixedDebtResult = namedtuple("FixedDebtResult", ["monthly_payment", "periodic_rate", "remaining_balance", "remaining_interest"])
+
+@functools.lru_cache(maxsize=256)
+def _periodic_rate(annual_rate):
+    half = 1 + annual_rate * 0.5
+    effective_rate = half * half - 1
+    return math.expm1(math.log1p(effective_rate) / 12)
+
+def _monthly_payment(principal, periodic_rate, months):
+    if periodic_rate == 0:
+        return principal / months
+    # 1 - (1 + r)**-n without the cancellation when r * n is small
+    denom = -math.expm1(-months * math.log1p(periodic_rate))
+    return principal * periodic_rate / denom
+
+def _remaining_balance_with_rate(principal, periodic_rate, monthly_payment, months_elapsed, total_term):
+    if months_elapsed == 0:
+        return principal
+    if months_elapsed >= total_term:
+        return 0.0
+    if periodic_rate == 0:
         return principal * (1 - months_elapsed / total_term)
-    monthly_payment, periodic_rate = calculate_monthly_payment(principal, annual_rate, total_term)
-    remaining_balance = principal * (1 + periodic_rate) ** months_elapsed - \
-                        (monthly_payment / periodic_rate) * ((1 + periodic_rate) ** months_elapsed - 1)
-    return remaining_balance
+    log_growth = months_elapsed * math.log1p(periodic_rate)
+    return principal * math.exp(log_growth) - (monthly_payment / periodic_rate) * math.expm1(log_growth)
 
+@st.cache_data(max_entries=1024, show_spinner=False)
 def calculate_monthly_payment(principal, annual_rate, months):
     if annual_rate == 0:
         return principal / months, 0
-    effective_rate = (1 + (annual_rate / 2)) ** 2 - 1
-    periodic_rate = (1 + effective_rate) ** (1 / 12) - 1
-    monthly_payment = principal * (periodic_rate / (1 - (1 + periodic_rate) ** -months))
-    return monthly_payment, periodic_rate
+    periodic_rate = _periodic_rate(annual_rate)
+    return _monthly_payment(principal, periodic_rate, months), periodic_rate
 
-def calculate_total_interest(principal, annual_rate, months):
+@st.cache_data(max_entries=1024, show_spinner=False)
+def calculate_total_interest(principal, annual_rate, months, monthly_payment=None):
     if months == 0:
         return 0
-    monthly_payment, _ = calculate_monthly_payment(principal, annual_rate, months)
+    if monthly_payment is None:
+        monthly_payment = _monthly_payment(principal, _periodic_rate(annual_rate), months)
     total_payment = monthly_payment * months
     return total_payment - principal
 
+@st.cache_data(max_entries=1024, show_spinner=False)
+def compute_fixed_debt(balance, annual_rate, term, months_elapsed):
+    # Payment, remaining balance and remaining interest in one pass over a shared periodic rate.
+    # The remaining balance re-amortizes over the remaining term at the same payment.
+    remaining_term = max(0, term - months_elapsed)
+    periodic_rate = _periodic_rate(annual_rate)
+    monthly_payment = _monthly_payment(balance, periodic_rate, term)
+    remaining_balance = _remaining_balance_with_rate(balance, periodic_rate, monthly_payment, months_elapsed, term)
+    remaining_interest = monthly_payment * remaining_term - remaining_balance if remaining_term else 0
+    return FixedDebtResult(monthly_payment, periodic_rate, remaining_balance, remaining_interest)
+
+@st.cache_data(max_entries=1024, show_spinner=False)
+def calculate_fixed_debts(balances, annual_rates, terms, months_elapsed):
+    # Array form of compute_fixed_debt, evaluated for every fixed debt at once
+    balances = np.asarray(balances, dtype=float)
+    annual_rates = np.asarray(annual_rates, dtype=float)
+    terms = np.asarray(terms, dtype=float)
+    months_elapsed = np.asarray(months_elapsed, dtype=float)
+    remaining_terms = np.maximum(0, terms - months_elapsed)
+
+    # Evaluate the interest-bearing formulas on a safe nonzero rate and term, then
+    # select the zero-rate and paid-off forms with np.where; no branching, no 0/0
+    zero_rate = annual_rates == 0
+    safe_rates = np.where(zero_rate, 1e-12, annual_rates)
+    paid_off = remaining_terms == 0
+
+    half = 1 + safe_rates * 0.5
+    effective_rates = half * half - 1
+    safe_periodic_rates = np.expm1(np.log1p(effective_rates) / 12)
+    periodic_rates = np.where(zero_rate, 0.0, safe_periodic_rates)
+
+    # Same log1p/exp/expm1 forms as _monthly_payment and _remaining_balance_with_rate
+    log_base = np.log1p(safe_periodic_rates)
+    monthly_payments = np.where(zero_rate, balances / terms,
+                                balances * safe_periodic_rates / -np.expm1(-terms * log_base))
+    log_growth = months_elapsed * log_base
+    remaining_balances = np.where(paid_off, 0.0, np.where(
+        zero_rate, balances * (1 - months_elapsed / terms),
+        balances * np.exp(log_growth) - (monthly_payments / safe_periodic_rates) * np.expm1(log_growth)))
+    remaining_interest = np.where(paid_off, 0.0, monthly_payments * remaining_terms - remaining_balances)
+    return FixedDebtResult(monthly_payments, periodic_rates, remaining_balances, remaining_interest)
+
 def calculate_revolving_payment(balance, annual_rate):
     min_payment_percent = 3
     fixed_min_payment = 10
     percentage_payment = balance * (min_payment_percent / 100)
     return max(percentage_payment, fixed_min_payment)
 
+@st.cache_data(max_entries=1024, show_spinner=False)
 def calculate_revolving_borrowing_cost_daily(balance, annual_rate, monthly_payment):
-    total_interest = 0
-    remaining_balance = balance
+    # Closed form of 30-day months of daily compounding: the debt clears on day one of
+    # the first month whose opening balance B satisfies B * (1 + daily_rate) <= payment
+    if balance <= 0:
+        return 0
     daily_rate = annual_rate / 365
     days_in_month = 30
-
-    while remaining_balance > 0:
-        monthly_interest = 0
-        for day in range(days_in_month):
-            daily_interest = remaining_balance * daily_rate
-            monthly_interest += daily_interest
-            remaining_balance += daily_interest
-            if monthly_payment >= remaining_balance:
-                total_interest += monthly_interest
-                remaining_balance = 0
-                break
-        if remaining_balance == 0:
-            break
-        total_interest += monthly_interest
-        payment = min(monthly_payment, remaining_balance)
-        remaining_balance -= payment
-        if remaining_balance < 0:
-            remaining_balance = 0
-    return round(total_interest, 2)
+    day_factor = 1 + daily_rate
+
+    if monthly_payment >= balance * day_factor:
+        return balance * daily_rate
+    if daily_rate == 0:
+        return 0 if monthly_payment > 0 else float('inf')
+
+    log_day_factor = math.log1p(daily_rate)
+    monthly_rate = math.expm1(days_in_month * log_day_factor)
+    if monthly_payment <= balance * monthly_rate:
+        # Payment never covers a month's interest, so the balance is never paid off
+        return float('inf')
+
+    annuity = monthly_payment / monthly_rate
+
+    def balance_after(months):
+        log_factor = months * days_in_month * log_day_factor
+        return balance * math.exp(log_factor) - annuity * math.expm1(log_factor)
+
+    ratio = (annuity - monthly_payment / day_factor) / (annuity - balance)
+    months = 1
+    if ratio > 1:
+        months = max(1, math.ceil(math.log(ratio) / (days_in_month * log_day_factor)))
+    # Correct any off-by-one from floating point error in the logarithm
+    if months > 1 and balance_after(months - 1) * day_factor <= monthly_payment:
+        months -= 1
+    elif balance_after(months) * day_factor > monthly_payment:
+        months += 1
+
+    final_balance = balance_after(months)
+    return monthly_payment * months + final_balance * day_factor - balance
 
 def calculate_weighted_average_interest(debts, mortgage_balance, mortgage_rate):
-    total_balance = mortgage_balance
-    weighted_sum = mortgage_balance * mortgage_rate
-    for debt in debts:
-        balance = debt['balance']
-        rate = debt['rate']
-        total_balance += balance
-        weighted_sum += balance * rate
+    balances = np.asarray(debts['balance'], dtype=np.float64)
+    rates = np.asarray(debts['rate'], dtype=np.float64)
+    total_balance = mortgage_balance + balances.sum()
+    weighted_sum = mortgage_balance * mortgage_rate + balances @ rates
     if total_balance == 0:
         return 0.0
-    return round(weighted_sum / total_balance * 100, 2)
+    return round(float(weighted_sum / total_balance) * 100, 2)
 
-def generate_repayment_timeline(balance, annual_rate, monthly_payment, max_months=360):
-    remaining_balance = balance
+def months_to_payoff(balance, annual_rate, monthly_payment, cap=360):
+    # Months until the balance reaches zero under monthly compounding, capped at cap months
+    if balance <= 0:
+        return 0
     monthly_rate = annual_rate / 12
-    timeline = []
-    for month in range(1, max_months + 1):
-        if remaining_balance <= 0:
-            break
-        interest = remaining_balance * monthly_rate
-        remaining_balance += interest - monthly_payment
-        if remaining_balance < 0:
-            remaining_balance = 0
-        timeline.append((month, remaining_balance))
-    return timeline
+    if monthly_rate == 0:
+        if monthly_payment <= 0:
+            return cap
+        return min(cap, math.ceil(balance / monthly_payment))
+    if balance * monthly_rate >= monthly_payment:
+        return cap
+    months = math.ceil(-math.log1p(-balance * monthly_rate / monthly_payment) / math.log1p(monthly_rate))
+    return min(cap, max(1, months))
+
+@st.cache_data(max_entries=64, show_spinner=False)
+def build_timeline_figure(bars):
+    # Horizontal bar chart of (name, months to pay off) pairs, cached by the bars. The
+    # Figure is built outside pyplot, so copies returned by the cache are never registered
+    # with pyplot and never need closing
+    ends = np.array([end for _, end in bars])
+    fig = Figure(figsize=(10, 6))
+    ax = fig.subplots()
+    # One barh call draws every bar; each keeps its own colour from the default cycle
+    ax.barh(np.arange(len(bars)), ends, height=0.5, color=[f"C{i % 10}" for i in range(len(bars))])
+
+    # Formatting the chart
+    ax.set_yticks(range(len(bars)))
+    ax.set_yticklabels([name for name, _ in bars])
+    ax.set_xlabel("Months")
+    ax.set_title("Repayment Timeline")
+    ax.invert_yaxis()  # Reverse the y-axis for better readability
+    return fig
 
 # Streamlit App
 st.title("Debt Consolidation Model")
 
 # Input Debt Details
 st.header("Debt Details")
-debts = []
-num_debts = st.number_input("Number of Debts", min_value=1, max_value=10, value=1)
-for i in range(num_debts):
-    st.subheader(f"Debt {i + 1}")
-    name = st.text_input(f"Name of Debt {i + 1}", value=f"Debt {i + 1}")
-    loan_type = st.selectbox(f"Type of Debt {i + 1}", ["Fixed", "Revolving"], key=f"type_{i}")
-    balance = st.number_input(f"Balance for {name}", min_value=0.0, step=100.0)
-    rate = st.number_input(f"Annual Interest Rate (%) for {name}", min_value=0.0, step=0.1) / 100
-
-    if loan_type == "Fixed":
-        term_months = st.number_input(f"Loan Term (Months) for {name}", min_value=1, step=1)
-        start_date = st.date_input(f"Start Date for {name}")
-        today = datetime.today()
-        start_date_datetime = datetime.combine(start_date, datetime.min.time())
-        months_elapsed = max(0, (today.year - start_date_datetime.year) * 12 + today.month - start_date_datetime.month)
-        remaining_term = max(0, term_months - months_elapsed)
-        remaining_balance = calculate_remaining_balance(balance, rate, months_elapsed, term_months)
-        monthly_payment, periodic_rate = calculate_monthly_payment(balance, rate, term_months)
-        remaining_interest = calculate_total_interest(remaining_balance, rate, remaining_term)
-
-        st.write(f"Monthly Payment for {name}: ${monthly_payment:,.2f}")
-        st.write(f"Remaining Balance for {name}: ${remaining_balance:,.2f}")
-        st.write(f"Remaining Interest to be Paid for {name}: ${remaining_interest:,.2f}")
-
-        debts.append({
-            "name": name,
-            "type": loan_type,
-            "balance": balance,
-            "rate": rate,
-            "remaining_term": remaining_term,
-            "monthly_payment": monthly_payment,
-            "remaining_interest": remaining_interest,
-            "remaining_balance": remaining_balance,
-        })
-
-    elif loan_type == "Revolving":
+today = datetime.today()
+# Inputs are held in a form so edits only rerun the app when "Calculate" is pressed
+with st.form("debt_form"):
+    # All debts are entered as rows of one table, which arrives as a DataFrame of columns
+    debt_inputs = st.data_editor(
+        pd.DataFrame({
+            "name": ["Debt 1"],
+            "type": ["Fixed"],
+            "balance": [0.0],
+            "rate": [0.0],
+            "term_months": [1],
+            "start_date": [today.date()],
+            "custom_payment": [np.nan],
+        }),
+        column_config={
+            "name": st.column_config.TextColumn("Name"),
+            "type": st.column_config.SelectboxColumn("Type", options=["Fixed", "Revolving"], default="Fixed", required=True),
+            "balance": st.column_config.NumberColumn("Balance", min_value=0.0, step=100.0, default=0.0),
+            "rate": st.column_config.NumberColumn("Annual Interest Rate (%)", min_value=0.0, step=0.1, default=0.0),
+            "term_months": st.column_config.NumberColumn("Loan Term (Months)", help="Fixed debts only",
+                                                         min_value=1, step=1, default=1),
+            "start_date": st.column_config.DateColumn("Start Date", help="Fixed debts only", default=today.date()),
+            "custom_payment": st.column_config.NumberColumn("Custom Monthly Payment",
+                                                            help="Revolving debts only, at least the minimum payment",
+                                                            min_value=0.0, step=10.0),
+        },
+        num_rows="dynamic",
+        hide_index=True,
+        key="debt_inputs",
+    ).reset_index(drop=True)
+
+    # Rows added in the editor may have blank cells
+    names = [name if isinstance(name, str) and name else f"Debt {i + 1}" for i, name in enumerate(debt_inputs["name"])]
+    types = debt_inputs["type"].fillna("Fixed").to_numpy()
+    balances = debt_inputs["balance"].fillna(0.0).to_numpy(dtype=float)
+    rates = debt_inputs["rate"].fillna(0.0).to_numpy(dtype=float) / 100
+    is_fixed = types == "Fixed"
+
+    monthly_payments = np.zeros(len(names))
+    remaining_balances = balances.copy()
+    remaining_interest = np.zeros(len(names))
+    total_interest = np.zeros(len(names))
+    remaining_terms = np.zeros(len(names), dtype=int)
+
+    if is_fixed.any():
+        fixed_inputs = debt_inputs[is_fixed]
+        terms = fixed_inputs["term_months"].fillna(1).to_numpy(dtype=int)
+        start_dates = pd.to_datetime(fixed_inputs["start_date"].fillna(today.date()))
+        # Reuse the last results while the fixed-debt inputs are unchanged between reruns
+        fixed_key = (today.year, today.month, tuple(zip(balances[is_fixed], rates[is_fixed], terms, start_dates)))
+        if st.session_state.get("fixed_debts_key") == fixed_key:
+            fixed_terms, fixed_results = st.session_state["fixed_debts_results"]
+        else:
+            months_elapsed = np.maximum(0, (today.year - start_dates.dt.year.to_numpy()) * 12
+                                        + today.month - start_dates.dt.month.to_numpy())
+            fixed_terms = np.maximum(0, terms - months_elapsed)
+            fixed_results = calculate_fixed_debts(balances[is_fixed], rates[is_fixed], terms, months_elapsed)
+            st.session_state["fixed_debts_key"] = fixed_key
+            st.session_state["fixed_debts_results"] = (fixed_terms, fixed_results)
+        remaining_terms[is_fixed] = fixed_terms
+        monthly_payments[is_fixed] = fixed_results.monthly_payment
+        remaining_balances[is_fixed] = fixed_results.remaining_balance
+        remaining_interest[is_fixed] = fixed_results.remaining_interest
+
+    for i in np.flatnonzero(~is_fixed):
+        balance = float(balances[i])
+        rate = float(rates[i])
         monthly_payment = calculate_revolving_payment(balance, rate)
-        use_custom_payment = st.checkbox(f"Use Custom Payment for {name}")
-        if use_custom_payment:
-            custom_payment = st.number_input(f"Custom Monthly Payment for {name}", min_value=monthly_payment, step=10.0)
-            monthly_payment = custom_payment
-        total_interest = calculate_revolving_borrowing_cost_daily(balance, rate, monthly_payment)
+        custom_payment = debt_inputs["custom_payment"].iloc[i]
+        if pd.notna(custom_payment):
+            monthly_payment = max(float(custom_payment), monthly_payment)
+        monthly_payments[i] = monthly_payment
+        total_interest[i] = calculate_revolving_borrowing_cost_daily(balance, rate, monthly_payment)
 
         # Estimate remaining term based on payments
-        remaining_term = int(balance / monthly_payment) if monthly_payment > 0 else 0
-
-        st.write(f"Calculated Monthly Payment for {name}: ${monthly_payment:,.2f}")
-        st.write(f"Total Interest Paid for {name}: ${total_interest:,.2f}")
-        st.write(f"Estimated Remaining Term for {name}: {remaining_term} months")
-
-        debts.append({
-            "name": name,
-            "type": loan_type,
-            "balance": balance,
-            "rate": rate,
-            "monthly_payment": monthly_payment,
-            "total_interest": total_interest,
-            "remaining_balance": balance,
-            "remaining_term": remaining_term,
-        })
-
-
-# Mortgage Details
-st.header("Mortgage Details")
-mortgage_balance = st.number_input("Current Mortgage Balance", min_value=0.0, step=1000.0)
-mortgage_rate = st.number_input("Current Mortgage Rate (%)", min_value=0.0, step=0.1) / 100
-mortgage_amortization = st.number_input("Mortgage Amortization (Months)", min_value=12, step=12)
-
-if mortgage_balance > 0 and mortgage_amortization > 0:
-    start_date = st.date_input("Mortgage Start Date")
-    today = datetime.today()
-    start_date_datetime = datetime.combine(start_date, datetime.min.time())
-    months_elapsed = max(0, (today.year - start_date_datetime.year) * 12 + today.month - start_date_datetime.month)
-    remaining_term = max(0, mortgage_amortization - months_elapsed)
-    remaining_balance = calculate_remaining_balance(mortgage_balance, mortgage_rate, months_elapsed, mortgage_amortization)
-    mortgage_payment, periodic_rate = calculate_monthly_payment(mortgage_balance, mortgage_rate, mortgage_amortization)
-    remaining_mortgage_interest = calculate_total_interest(remaining_balance, mortgage_rate, remaining_term)
-
-    st.write(f"Calculated Monthly Payment for Current Mortgage: ${mortgage_payment:,.2f}")
-    st.write(f"Remaining Balance for Current Mortgage: ${remaining_balance:,.2f}")
-    st.write(f"Remaining Interest on Current Mortgage: ${remaining_mortgage_interest:,.2f}")
+        remaining_terms[i] = int(balance / monthly_payment) if monthly_payment > 0 else 0
+
+    for i, name in enumerate(names):
+        if is_fixed[i]:
+            st.write(f"Monthly Payment for {name}: ${monthly_payments[i]:,.2f}")
+            st.write(f"Remaining Balance for {name}: ${remaining_balances[i]:,.2f}")
+            st.write(f"Remaining Interest to be Paid for {name}: ${remaining_interest[i]:,.2f}")
+        else:
+            st.write(f"Calculated Monthly Payment for {name}: ${monthly_payments[i]:,.2f}")
+            if np.isinf(total_interest[i]):
+                # The payment never covers the interest, so there is no finite cost or term
+                st.write(f"Total Interest Paid for {name}: Never paid off")
+                st.write(f"Estimated Remaining Term for {name}: Never paid off")
+            else:
+                st.write(f"Total Interest Paid for {name}: ${total_interest[i]:,.2f}")
+                st.write(f"Estimated Remaining Term for {name}: {remaining_terms[i]} months")
+
+    # Mortgage Details
+    st.header("Mortgage Details")
+    mortgage_balance = st.number_input("Current Mortgage Balance", min_value=0.0, step=1000.0)
+    mortgage_rate = st.number_input("Current Mortgage Rate (%)", min_value=0.0, step=0.1) / 100
+    mortgage_amortization = st.number_input("Mortgage Amortization (Months)", min_value=12, step=12)
+
+    if mortgage_balance > 0 and mortgage_amortization > 0:
+        start_date = st.date_input("Mortgage Start Date")
+        months_elapsed = max(0, (today.year - start_date.year) * 12 + today.month - start_date.month)
+        mortgage_payment, periodic_rate, remaining_balance, remaining_mortgage_interest = compute_fixed_debt(
+            mortgage_balance, mortgage_rate, mortgage_amortization, months_elapsed)
+
+        st.write(f"Calculated Monthly Payment for Current Mortgage: ${mortgage_payment:,.2f}")
+        st.write(f"Remaining Balance for Current Mortgage: ${remaining_balance:,.2f}")
+        st.write(f"Remaining Interest on Current Mortgage: ${remaining_mortgage_interest:,.2f}")
+
+    st.form_submit_button("Calculate")
+
+# Structure-of-arrays view of the debts for the aggregates below
+debts = {
+    "name": np.array(names, dtype=str),
+    "type": types,
+    "balance": balances,
+    "rate": rates,
+    "monthly_payment": monthly_payments,
+    "remaining_balance": remaining_balances,
+    "remaining_interest": remaining_interest,
+    "total_interest": total_interest,
+    "remaining_term": remaining_terms,
+}
 
 # Consolidation Parameters
 st.header("Consolidation Parameters")
 new_rate = st.number_input("New Mortgage Rate (%)", min_value=0.0, step=0.1) / 100
 new_amortization = st.number_input("New Amortization Length (Months)", min_value=12, step=12)
 fees = st.number_input("Refinancing Fees", min_value=0.0, step=100.0)
-selected_debts = st.multiselect("Select Debts to Consolidate", [debt["name"] for debt in debts])
+selected_debts = st.multiselect("Select Debts to Consolidate", debts["name"].tolist())
 
 # Weighted Average Interest Rate
-if debts:
+if len(debts["name"]):
     pre_consolidation_wair = calculate_weighted_average_interest(debts, mortgage_balance, mortgage_rate)
     st.write(f"Pre-Consolidation Weighted Average Interest Rate: {pre_consolidation_wair:.2f}%")
 
-# Consolidation Logic
-if selected_debts and new_amortization > 0:
-    new_balance = remaining_balance + sum(debt.get('remaining_balance', debt['balance']) for debt in debts if debt['name'] in selected_debts) + fees
-    consolidated_monthly_payment, _ = calculate_monthly_payment(new_balance, new_rate, new_amortization)
-    consolidated_total_interest = calculate_total_interest(new_balance, new_rate, new_amortization)
-
-    st.subheader("Scenario Comparison")
-    comparison_data = {
-        "Metric": [
-            "Total Interest to be Paid",
-            "Monthly Payment",
-            "Time to Pay Off Debts (Months)",
-            "Net Savings from Consolidation"
-        ],
-        "Current Scenario": [
-            remaining_mortgage_interest + sum(debt.get('total_interest', 0) for debt in debts),
-            mortgage_payment + sum(debt['monthly_payment'] for debt in debts),
-            max(mortgage_amortization, max(debt.get('remaining_term', 0) for debt in debts)),
-            "N/A"
-        ],
-        "Consolidated Scenario": [
-            consolidated_total_interest,
-            consolidated_monthly_payment,
-            new_amortization,
-            (remaining_mortgage_interest + sum(debt.get('total_interest', 0) for debt in debts)) - consolidated_total_interest
+# Consolidation Logic, run only when requested. The last comparison stays in session state
+# so it survives later reruns without being recomputed.
+if st.button("Compute Comparison"):
+    st.session_state.pop("comparison", None)
+    if selected_debts and new_amortization > 0:
+        # Debt aggregates, each reduced once over the debt arrays
+        selected_mask = np.isin(debts["name"], selected_debts)
+        selected_balance = debts["remaining_balance"][selected_mask].sum()
+        total_debt_interest = debts["total_interest"].sum()
+        total_debt_payment = debts["monthly_payment"].sum()
+        longest_debt_term = int(debts["remaining_term"].max())
+
+        new_balance = remaining_balance + selected_balance + fees
+        consolidated_monthly_payment, _ = calculate_monthly_payment(new_balance, new_rate, new_amortization)
+        consolidated_total_interest = calculate_total_interest(new_balance, new_rate, new_amortization,
+                                                               consolidated_monthly_payment)
+        current_total_interest = remaining_mortgage_interest + total_debt_interest
+        # A debt that is never paid off has no finite interest, term or savings to compare
+        never_paid_off = math.isinf(total_debt_interest)
+
+        # Numbers are formatted to 2 decimal places as the table is built
+        comparison_data = {
+            "Metric": [
+                "Total Interest to be Paid",
+                "Monthly Payment",
+                "Time to Pay Off Debts (Months)",
+                "Net Savings from Consolidation"
+            ],
+            "Current Scenario": [
+                "Never paid off" if never_paid_off else f"{current_total_interest:,.2f}",
+                f"{mortgage_payment + total_debt_payment:,.2f}",
+                "Never paid off" if never_paid_off else f"{max(mortgage_amortization, longest_debt_term):,.2f}",
+                "N/A"
+            ],
+            "Consolidated Scenario": [
+                f"{consolidated_total_interest:,.2f}",
+                f"{consolidated_monthly_payment:,.2f}",
+                f"{new_amortization:,.2f}",
+                "N/A" if never_paid_off else f"{current_total_interest - consolidated_total_interest:,.2f}"
+            ]
+        }
+
+        # Timeline Visualization: months to pay off each debt, the original mortgage and the
+        # consolidated debt, kept as parallel name and month columns like the debt arrays
+        timeline_names = debts["name"].tolist() + ["Original Mortgage", "Consolidated Debt"]
+        timeline_months = [
+            months_to_payoff(balance=debt_balance, annual_rate=debt_rate, monthly_payment=debt_payment)
+            for debt_balance, debt_rate, debt_payment in zip(
+                debts["remaining_balance"], debts["rate"], debts["monthly_payment"])
         ]
-    }
-    comparison_df = pd.DataFrame(comparison_data)
-
-    # Format numbers to 2 decimal places
-    comparison_df["Current Scenario"] = comparison_df["Current Scenario"].apply(
-        lambda x: f"{x:,.2f}" if isinstance(x, (int, float)) else x
-    )
-    comparison_df["Consolidated Scenario"] = comparison_df["Consolidated Scenario"].apply(
-        lambda x: f"{x:,.2f}" if isinstance(x, (int, float)) else x
-    )
-
-    # Display the formatted dataframe
-    st.write(comparison_df)
-
-    # Timeline Visualization
-    repayment_data = []
-
-    # Add individual debts
-    for debt in debts:
-        name = debt['name']
-        remaining_payments = len(generate_repayment_timeline(
-            balance=debt.get('remaining_balance', debt['balance']),
-            annual_rate=debt['rate'],
-            monthly_payment=debt['monthly_payment']
+        timeline_months.append(months_to_payoff(
+            balance=remaining_balance,
+            annual_rate=mortgage_rate,
+            monthly_payment=mortgage_payment
         ))
-        repayment_data.append({"name": name, "start": 0, "end": remaining_payments})
-
-    # Add original mortgage
-    original_mortgage_payments = len(generate_repayment_timeline(
-        balance=remaining_balance,
-        annual_rate=mortgage_rate,
-        monthly_payment=mortgage_payment
-    ))
-    repayment_data.append({"name": "Original Mortgage", "start": 0, "end": original_mortgage_payments})
-
-    # Add consolidated debt
-    consolidated_payments = len(generate_repayment_timeline(
-        balance=new_balance,
-        annual_rate=new_rate,
-        monthly_payment=consolidated_monthly_payment,
-        max_months=new_amortization
-    ))
-    repayment_data.append({"name": "Consolidated Debt", "start": 0, "end": consolidated_payments})
-
-    # Create the horizontal bar chart
-    fig, ax = plt.subplots(figsize=(10, 6))
-    for i, item in enumerate(repayment_data):
-        ax.barh(i, item["end"] - item["start"], left=item["start"], height=0.5, label=item["name"])
-
-    # Formatting the chart
-    ax.set_yticks(range(len(repayment_data)))
-    ax.set_yticklabels([item["name"] for item in repayment_data])
-    ax.set_xlabel("Months")
-    ax.set_title("Repayment Timeline")
-    ax.invert_yaxis()  # Reverse the y-axis for better readability
-    ax.legend()
-
-    # Display the chart
-    st.pyplot(fig)
+        timeline_months.append(months_to_payoff(
+            balance=new_balance,
+            annual_rate=new_rate,
+            monthly_payment=consolidated_monthly_payment,
+            cap=new_amortization
+        ))
+        st.session_state["comparison"] = (comparison_data, tuple(zip(timeline_names, timeline_months)))
 
+if "comparison" in st.session_state:
+    comparison_data, timeline_bars = st.session_state["comparison"]
+    st.subheader("Scenario Comparison")
 
+    # Display the formatted table; st.table takes the dict of columns as is
+    st.table(comparison_data)
 
+    # Create the horizontal bar chart and display it
+    st.pyplot(build_timeline_figure(timeline_bars))